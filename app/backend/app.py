@@ -1,3 +1,4 @@
+import asyncio
 import dataclasses
 import io
 import json
@@ -6,7 +7,7 @@ import mimetypes
 import os
 import time
 from pathlib import Path
-from typing import Any, AsyncGenerator, Dict, Union, cast
+from typing import Any, AsyncGenerator, Dict, Optional, Union, cast
 
 from azure.cognitiveservices.speech import (
     ResultReason,
@@ -15,7 +16,7 @@ from azure.cognitiveservices.speech import (
     SpeechSynthesisResult,
     SpeechSynthesizer,
 )
-from azure.core.exceptions import ResourceNotFoundError
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
 from azure.identity.aio import DefaultAzureCredential, get_bearer_token_provider
 from azure.monitor.opentelemetry import configure_azure_monitor
 from azure.search.documents.aio import SearchClient
@@ -39,10 +40,10 @@ from quart import (
     jsonify,
     make_response,
     request,
-    send_file,
     send_from_directory,
 )
 from quart_cors import cors
+from werkzeug.datastructures import ContentRange
 
 from approaches.approach import Approach
 from approaches.chatreadretrieveread import ChatReadRetrieveReadApproach
@@ -121,7 +122,7 @@ async def content_file(path: str, auth_claims: Dict[str, Any]):
     *** NOTE *** if you are using app services authentication, this route will return unauthorized to all users that are not logged in
     if AZURE_ENFORCE_ACCESS_CONTROL is not set or false, logged in users can access all files regardless of access control
     if AZURE_ENFORCE_ACCESS_CONTROL is set to true, logged in users can only access files they have access to
-    This is also slow and memory hungry.
+    This is also slow, as every file is proxied through the app.
     """
     # Remove page number from path, filename-1.txt -> filename.txt
     # This shouldn't typically be necessary as browsers don't send hash fragments to servers
@@ -130,32 +131,68 @@ async def content_file(path: str, auth_claims: Dict[str, Any]):
         path = path_parts[0]
     logging.info("Opening file %s", path)
     blob_container_client: ContainerClient = current_app.config[CONFIG_BLOB_CONTAINER_CLIENT]
+    # PDF viewers fetch the pages they show with Range requests, so only download the requested bytes
+    download_range: Dict[str, Any] = {}
+    if request.range and request.range.units == "bytes" and len(request.range.ranges) == 1:
+        start, stop = request.range.ranges[0]
+        if start >= 0:
+            download_range = {"offset": start, "length": stop - start if stop is not None else None}
     blob: Union[BlobDownloader, DatalakeDownloader]
+    file_size: Optional[int] = None
     try:
-        blob = await blob_container_client.get_blob_client(path).download_blob()
-    except ResourceNotFoundError:
-        logging.info("Path not found in general Blob container: %s", path)
-        if current_app.config[CONFIG_USER_UPLOAD_ENABLED]:
-            try:
-                user_oid = auth_claims["oid"]
-                user_blob_container_client = current_app.config[CONFIG_USER_BLOB_CONTAINER_CLIENT]
-                user_directory_client: FileSystemClient = user_blob_container_client.get_directory_client(user_oid)
-                file_client = user_directory_client.get_file_client(path)
-                blob = await file_client.download_file()
-            except ResourceNotFoundError:
-                logging.exception("Path not found in DataLake: %s", path)
+        try:
+            blob = await blob_container_client.get_blob_client(path).download_blob(**download_range)
+            content_range = blob.properties.content_range if blob.properties else None
+            if download_range and content_range:
+                # The full file size follows the "/" of the range the downloader fetched
+                file_size = int(content_range.rsplit("/", 1)[1])
+        except ResourceNotFoundError:
+            logging.info("Path not found in general Blob container: %s", path)
+            if current_app.config[CONFIG_USER_UPLOAD_ENABLED]:
+                try:
+                    user_oid = auth_claims["oid"]
+                    user_blob_container_client = current_app.config[CONFIG_USER_BLOB_CONTAINER_CLIENT]
+                    user_directory_client: FileSystemClient = user_blob_container_client.get_directory_client(user_oid)
+                    file_client = user_directory_client.get_file_client(path)
+                    blob = await file_client.download_file(**download_range)
+                    if download_range:
+                        # DataLake downloads don't report the full file size, so look it up
+                        file_size = (await file_client.get_file_properties()).size
+                except ResourceNotFoundError:
+                    logging.exception("Path not found in DataLake: %s", path)
+                    abort(404)
+            else:
                 abort(404)
-        else:
-            abort(404)
+    except HttpResponseError as error:
+        if error.status_code != 416:
+            raise
+        abort(416)
     if not blob.properties or not blob.properties.has_key("content_settings"):
         abort(404)
     mime_type = blob.properties["content_settings"]["content_type"]
-    if mime_type == "application/octet-stream":
+    if not mime_type or mime_type == "application/octet-stream":
         mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
-    blob_file = io.BytesIO()
-    await blob.readinto(blob_file)
-    blob_file.seek(0)
-    return await send_file(blob_file, mimetype=mime_type, as_attachment=False, attachment_filename=path)
+
+    # Stream the blob through in chunks instead of buffering the whole file in memory
+    async def stream_blob():
+        async for chunk in blob.chunks():
+            yield chunk
+
+    response = await make_response(stream_blob(), 206 if download_range else 200)
+    response.timeout = None  # type: ignore
+    response.mimetype = mime_type
+    response.accept_ranges = "bytes"
+    response.cache_control.public = True
+    # PDF viewers need the length up front to jump to a #page= citation
+    if download_range and file_size is not None:
+        # The downloader's size overshoots when the range runs past the end of the file, so clamp it here
+        start, length = download_range["offset"], download_range["length"]
+        stop = file_size if length is None else min(start + length, file_size)
+        response.content_length = stop - start
+        response.content_range = ContentRange("bytes", start, stop, file_size)
+    elif blob.size is not None:
+        response.content_length = blob.size
+    return response
 
 
 @bp.route("/ask", methods=["POST"])
@@ -301,7 +338,8 @@ async def speech():
         speech_config.speech_synthesis_voice_name = current_app.config[CONFIG_SPEECH_SERVICE_VOICE]
         speech_config.speech_synthesis_output_format = SpeechSynthesisOutputFormat.Audio16Khz32KBitRateMonoMp3
         synthesizer = SpeechSynthesizer(speech_config=speech_config, audio_config=None)
-        result: SpeechSynthesisResult = synthesizer.speak_text_async(text).get()
+        # Waiting on the synthesis future blocks, so do it in a thread to keep serving other requests
+        result: SpeechSynthesisResult = await asyncio.to_thread(synthesizer.speak_text_async(text).get)
         if result.reason == ResultReason.SynthesizingAudioCompleted:
             return result.audio_data, 200, {"Content-Type": "audio/mp3"}
         elif result.reason == ResultReason.Canceled:
@@ -429,6 +467,7 @@ async def setup_clients():
 
     USE_GPT4V = os.getenv("USE_GPT4V", "").lower() == "true"
     USE_USER_UPLOAD = os.getenv("USE_USER_UPLOAD", "").lower() == "true"
+    USER_UPLOAD_EMBEDDINGS_CACHE_SIZE = max(0, int(os.getenv("USER_UPLOAD_EMBEDDINGS_CACHE_SIZE", 100)))
     USE_SPEECH_INPUT_BROWSER = os.getenv("USE_SPEECH_INPUT_BROWSER", "").lower() == "true"
     USE_SPEECH_OUTPUT_BROWSER = os.getenv("USE_SPEECH_OUTPUT_BROWSER", "").lower() == "true"
     USE_SPEECH_OUTPUT_AZURE = os.getenv("USE_SPEECH_OUTPUT_AZURE", "").lower() == "true"
@@ -506,6 +545,8 @@ async def setup_clients():
             openai_key=clean_key_if_exists(OPENAI_API_KEY),
             openai_org=OPENAI_ORGANIZATION,
             disable_vectors=os.getenv("USE_VECTORS", "").lower() == "false",
+            # Re-uploaded files usually share most of their chunks, so skip re-embedding those
+            cache_size=USER_UPLOAD_EMBEDDINGS_CACHE_SIZE,
         )
         ingester = UploadUserFileStrategy(
             search_info=search_info, embeddings=text_embeddings_service, file_processors=file_processors
@@ -653,6 +694,8 @@ async def close_clients():
     await current_app.config[CONFIG_BLOB_CONTAINER_CLIENT].close()
     if current_app.config.get(CONFIG_USER_BLOB_CONTAINER_CLIENT):
         await current_app.config[CONFIG_USER_BLOB_CONTAINER_CLIENT].close()
+    if current_app.config.get(CONFIG_INGESTER):
+        await current_app.config[CONFIG_INGESTER].close()
 
 
 def create_app():
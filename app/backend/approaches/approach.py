@@ -1,3 +1,4 @@
+import asyncio
 import os
 from abc import ABC
 from dataclasses import dataclass
@@ -90,7 +91,17 @@ class ThoughtStep:
     props: Optional[dict[str, Any]] = None
 
 
+class ExtraArgs(TypedDict, total=False):
+    dimensions: int
+
+
 class Approach(ABC):
+    SUPPORTED_DIMENSIONS_MODEL = {
+        "text-embedding-ada-002": False,
+        "text-embedding-3-small": True,
+        "text-embedding-3-large": True,
+    }
+
     def __init__(
         self,
         search_client: SearchClient,
@@ -183,14 +194,14 @@ class Approach(ABC):
                     )
                 )
 
-            qualified_documents = [
-                doc
-                for doc in documents
-                if (
-                    (doc.score or 0) >= (minimum_search_score or 0)
-                    and (doc.reranker_score or 0) >= (minimum_reranker_score or 0)
-                )
-            ]
+        qualified_documents = [
+            doc
+            for doc in documents
+            if (
+                (doc.score or 0) >= (minimum_search_score or 0)
+                and (doc.reranker_score or 0) >= (minimum_reranker_score or 0)
+            )
+        ]
 
         return qualified_documents
 
@@ -223,17 +234,10 @@ class Approach(ABC):
             return sourcepage
 
     async def compute_text_embedding(self, q: str):
-        SUPPORTED_DIMENSIONS_MODEL = {
-            "text-embedding-ada-002": False,
-            "text-embedding-3-small": True,
-            "text-embedding-3-large": True,
-        }
-
-        class ExtraArgs(TypedDict, total=False):
-            dimensions: int
-
         dimensions_args: ExtraArgs = (
-            {"dimensions": self.embedding_dimensions} if SUPPORTED_DIMENSIONS_MODEL[self.embedding_model] else {}
+            {"dimensions": self.embedding_dimensions}
+            if Approach.SUPPORTED_DIMENSIONS_MODEL[self.embedding_model]
+            else {}
         )
         embedding = await self.openai_client.embeddings.create(
             # Azure OpenAI takes the deployment name as the model name
@@ -260,6 +264,23 @@ class Approach(ABC):
                 image_query_vector = json["vector"]
         return VectorizedQuery(vector=image_query_vector, k_nearest_neighbors=50, fields="imageEmbedding")
 
+    async def compute_vector_field_embeddings(self, q: str, vector_fields: List[str]) -> List[VectorQuery]:
+        # The text and image embeddings don't depend on each other, so compute them concurrently
+        tasks = [
+            asyncio.create_task(
+                self.compute_text_embedding(q) if field == "embedding" else self.compute_image_embedding(q)
+            )
+            for field in vector_fields
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave the other embedding request running after one has failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
     async def run(
         self,
         messages: list[ChatCompletionMessageParam],
@@ -16,6 +16,7 @@ class ChatApproach(Approach, ABC):
         {"role": "assistant", "content": "Show available health plans"},
     ]
     NO_RESPONSE = "0"
+    FOLLOWUP_QUESTIONS_PATTERN = re.compile(r"<<([^>>]+)>>")
 
     follow_up_questions_prompt_content = """Generate 3 very brief follow-up questions that the user would likely ask next.
     Enclose the follow-up questions in double angle brackets. Example:
@@ -76,7 +77,7 @@ class ChatApproach(Approach, ABC):
         return user_query
 
     def extract_followup_questions(self, content: str):
-        return content.split("<<")[0], re.findall(r"<<([^>>]+)>>", content)
+        return content.split("<<")[0], self.FOLLOWUP_QUESTIONS_PATTERN.findall(content)
 
     async def run_without_streaming(
         self,
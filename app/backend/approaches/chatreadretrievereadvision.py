@@ -137,13 +137,7 @@ class ChatReadRetrieveReadVisionApproach(ChatApproach):
         # If retrieval mode includes vectors, compute an embedding for the query
         vectors = []
         if use_vector_search:
-            for field in vector_fields:
-                vector = (
-                    await self.compute_text_embedding(query_text)
-                    if field == "embedding"
-                    else await self.compute_image_embedding(query_text)
-                )
-                vectors.append(vector)
+            vectors.extend(await self.compute_vector_field_embeddings(query_text, vector_fields))
 
         results = await self.search(
             top,
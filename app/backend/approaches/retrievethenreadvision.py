@@ -97,13 +97,7 @@ class RetrieveThenReadVisionApproach(Approach):
         # If retrieval mode includes vectors, compute an embedding for the query
         vectors = []
         if use_vector_search:
-            for field in vector_fields:
-                vector = (
-                    await self.compute_text_embedding(q)
-                    if field == "embedding"
-                    else await self.compute_image_embedding(q)
-                )
-                vectors.append(vector)
+            vectors.extend(await self.compute_vector_field_embeddings(q, vector_fields))
 
         results = await self.search(
             top,
@@ -116,6 +116,7 @@ def setup_embeddings_service(
     openai_org: Union[str, None],
     disable_vectors: bool = False,
     disable_batch_vectors: bool = False,
+    cache_size: int = 0,
 ):
     if disable_vectors:
         logger.info("Not setting up embeddings service")
@@ -133,6 +134,7 @@ def setup_embeddings_service(
             open_ai_dimensions=openai_dimensions,
             credential=azure_open_ai_credential,
             disable_batch=disable_batch_vectors,
+            cache_size=cache_size,
         )
     else:
         if openai_key is None:
@@ -143,6 +145,7 @@ def setup_embeddings_service(
             credential=openai_key,
             organization=openai_org,
             disable_batch=disable_batch_vectors,
+            cache_size=cache_size,
         )
 
 
@@ -209,10 +212,13 @@ def setup_image_embeddings_service(
 
 
 async def main(strategy: Strategy, setup_index: bool = True):
-    if setup_index:
-        await strategy.setup()
+    try:
+        if setup_index:
+            await strategy.setup()
 
-    await strategy.run()
+        await strategy.run()
+    finally:
+        await strategy.close()
 
 
 if __name__ == "__main__":
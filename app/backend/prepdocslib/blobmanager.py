@@ -1,9 +1,13 @@
+import asyncio
 import datetime
 import io
 import logging
 import os
 import re
-from typing import List, Optional, Union
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Deque, List, Optional, Tuple, Union
 
 import fitz  # type: ignore
 from azure.core.credentials_async import AsyncTokenCredential
@@ -21,11 +25,77 @@ from .listfilestrategy import File
 logger = logging.getLogger("ingester")
 
 
+@lru_cache(maxsize=None)
+def load_font() -> Optional[ImageFont.FreeTypeFont]:
+    try:
+        return ImageFont.truetype("arial.ttf", 20)
+    except OSError:
+        try:
+            return ImageFont.truetype("/usr/share/fonts/truetype/freefont/FreeMono.ttf", 20)
+        except OSError:
+            logger.info("Unable to find arial.ttf or FreeMono.ttf, using default font")
+            return None
+
+
+# Each render worker keeps the PDF it is currently rendering open, so a file is parsed once per process
+# rather than once per page. Workers live as long as the BlobManager's executor, and a file's pages are all
+# rendered before the next file's, so the previous document is closed as soon as a new one is requested.
+_open_pdf_key: Optional[Tuple[str, int]] = None
+_open_pdf_doc: Optional[fitz.Document] = None
+
+
+def open_pdf(filename: str, mtime_ns: int) -> fitz.Document:
+    global _open_pdf_key, _open_pdf_doc
+    # The modification time is part of the key so that a file overwritten in place is opened again
+    if _open_pdf_key != (filename, mtime_ns) or _open_pdf_doc is None:
+        if _open_pdf_doc is not None:
+            _open_pdf_doc.close()
+            _open_pdf_doc = None
+        _open_pdf_doc = fitz.open(filename)
+        _open_pdf_key = (filename, mtime_ns)
+    return _open_pdf_doc
+
+
+def render_page_image(filename: str, mtime_ns: int, page_num: int, blob_name: str) -> bytes:
+    """
+    Renders a page of a PDF as a PNG with its blob name written above it.
+    Defined at module level so that it can be run in a worker process.
+    """
+    doc = open_pdf(filename, mtime_ns)
+    page = doc.load_page(page_num)
+    pix = page.get_pixmap()
+    original_img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)  # type: ignore
+
+    # Create a new image with additional space for text
+    text_height = 40  # Height of the text area
+    new_img = Image.new("RGB", (original_img.width, original_img.height + text_height), "white")
+
+    # Paste the original image onto the new image
+    new_img.paste(original_img, (0, text_height))
+
+    # Draw the text on the white area
+    draw = ImageDraw.Draw(new_img)
+    text = f"SourceFileName:{blob_name}"
+
+    # 10 pixels from the top and left of the image
+    x = 10
+    y = 10
+    draw.text((x, y), text, font=load_font(), fill="black")
+
+    output = io.BytesIO()
+    new_img.save(output, format="PNG")
+    return output.getvalue()
+
+
 class BlobManager:
     """
     Class to manage uploading and deleting blobs containing citation information from a blob storage account
     """
 
+    # Large files are uploaded as blocks of this size, several blocks at a time
+    UPLOAD_BLOCK_SIZE = 16 * 1024 * 1024
+    UPLOAD_MAX_CONCURRENCY = 8
+
     def __init__(
         self,
         endpoint: str,
@@ -44,11 +114,38 @@ class BlobManager:
         self.resourceGroup = resourceGroup
         self.subscriptionId = subscriptionId
         self.user_delegation_key: Optional[UserDelegationKey] = None
+        # Page images are rendered in worker processes, started on first use and reused for every file
+        self.render_workers = os.cpu_count() or 1
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.service_client: Optional[BlobServiceClient] = None
+
+    def get_service_client(self) -> BlobServiceClient:
+        # Reuse one client (and its connection pool) for every file instead of reconnecting each time
+        if self.service_client is None:
+            self.service_client = BlobServiceClient(
+                account_url=self.endpoint,
+                credential=self.credential,
+                max_single_put_size=4 * 1024 * 1024,
+                max_block_size=BlobManager.UPLOAD_BLOCK_SIZE,
+            )
+        return self.service_client
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.render_workers)
+        return self.executor
+
+    async def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        if self.service_client is not None:
+            await self.service_client.close()
+            self.service_client = None
 
     async def upload_blob(self, file: File) -> Optional[List[str]]:
-        async with BlobServiceClient(
-            account_url=self.endpoint, credential=self.credential, max_single_put_size=4 * 1024 * 1024
-        ) as service_client, service_client.get_container_client(self.container) as container_client:
+        service_client = self.get_service_client()
+        async with service_client.get_container_client(self.container) as container_client:
             if not await container_client.exists():
                 await container_client.create_container()
 
@@ -57,7 +154,13 @@ class BlobManager:
                 with open(file.content.name, "rb") as reopened_file:
                     blob_name = BlobManager.blob_name_from_file_name(file.content.name)
                     logger.info("Uploading blob for whole file -> %s", blob_name)
-                    blob_client = await container_client.upload_blob(blob_name, reopened_file, overwrite=True)
+                    blob_client = await container_client.upload_blob(
+                        blob_name,
+                        reopened_file,
+                        overwrite=True,
+                        length=os.path.getsize(file.content.name),
+                        max_concurrency=BlobManager.UPLOAD_MAX_CONCURRENCY,
+                    )
                     file.url = blob_client.url
 
             if self.store_page_images:
@@ -77,71 +180,62 @@ class BlobManager:
         with open(file.content.name, "rb") as reopened_file:
             reader = PdfReader(reopened_file)
             page_count = len(reader.pages)
-        doc = fitz.open(file.content.name)
         sas_uris = []
         start_time = datetime.datetime.now(datetime.timezone.utc)
         expiry_time = start_time + datetime.timedelta(days=1)
 
-        font = None
+        # Rendering pages is CPU bound, so spread it across processes and upload each page as it is ready.
+        # Only a few pages are rendered ahead of the uploads so that a large PDF isn't held in memory.
+        loop = asyncio.get_running_loop()
+        executor = self.get_executor()
+        mtime_ns = os.stat(file.content.name).st_mtime_ns
+        rendered_pages: Deque[asyncio.Future[bytes]] = deque()
+        next_page = 0
         try:
-            font = ImageFont.truetype("arial.ttf", 20)
-        except OSError:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/freefont/FreeMono.ttf", 20)
-            except OSError:
-                logger.info("Unable to find arial.ttf or FreeMono.ttf, using default font")
-
-        for i in range(page_count):
-            blob_name = BlobManager.blob_image_name_from_file_page(file.content.name, i)
-            logger.info("Converting page %s to image and uploading -> %s", i, blob_name)
-
-            doc = fitz.open(file.content.name)
-            page = doc.load_page(i)
-            pix = page.get_pixmap()
-            original_img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)  # type: ignore
-
-            # Create a new image with additional space for text
-            text_height = 40  # Height of the text area
-            new_img = Image.new("RGB", (original_img.width, original_img.height + text_height), "white")
-
-            # Paste the original image onto the new image
-            new_img.paste(original_img, (0, text_height))
-
-            # Draw the text on the white area
-            draw = ImageDraw.Draw(new_img)
-            text = f"SourceFileName:{blob_name}"
-
-            # 10 pixels from the top and left of the image
-            x = 10
-            y = 10
-            draw.text((x, y), text, font=font, fill="black")
-
-            output = io.BytesIO()
-            new_img.save(output, format="PNG")
-            output.seek(0)
-
-            blob_client = await container_client.upload_blob(blob_name, output, overwrite=True)
-            if not self.user_delegation_key:
-                self.user_delegation_key = await service_client.get_user_delegation_key(start_time, expiry_time)
-
-            if blob_client.account_name is not None:
-                sas_token = generate_blob_sas(
-                    account_name=blob_client.account_name,
-                    container_name=blob_client.container_name,
-                    blob_name=blob_client.blob_name,
-                    user_delegation_key=self.user_delegation_key,
-                    permission=BlobSasPermissions(read=True),
-                    expiry=expiry_time,
-                    start=start_time,
-                )
-                sas_uris.append(f"{blob_client.url}?{sas_token}")
+            for i in range(page_count):
+                while next_page < page_count and len(rendered_pages) < self.render_workers * 2:
+                    rendered_pages.append(
+                        loop.run_in_executor(
+                            executor,
+                            render_page_image,
+                            file.content.name,
+                            mtime_ns,
+                            next_page,
+                            BlobManager.blob_image_name_from_file_page(file.content.name, next_page),
+                        )
+                    )
+                    next_page += 1
+
+                blob_name = BlobManager.blob_image_name_from_file_page(file.content.name, i)
+                logger.info("Converting page %s to image and uploading -> %s", i, blob_name)
+                output = io.BytesIO(await rendered_pages.popleft())
+                blob_client = await container_client.upload_blob(blob_name, output, overwrite=True)
+                if not self.user_delegation_key:
+                    self.user_delegation_key = await service_client.get_user_delegation_key(start_time, expiry_time)
+
+                if blob_client.account_name is not None:
+                    sas_token = generate_blob_sas(
+                        account_name=blob_client.account_name,
+                        container_name=blob_client.container_name,
+                        blob_name=blob_client.blob_name,
+                        user_delegation_key=self.user_delegation_key,
+                        permission=BlobSasPermissions(read=True),
+                        expiry=expiry_time,
+                        start=start_time,
+                    )
+                    sas_uris.append(f"{blob_client.url}?{sas_token}")
+        except BaseException:
+            # Drop the pages that won't be uploaded without blocking the event loop until they finish rendering
+            for rendered_page in rendered_pages:
+                rendered_page.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            raise
 
         return sas_uris
 
     async def remove_blob(self, path: Optional[str] = None):
-        async with BlobServiceClient(
-            account_url=self.endpoint, credential=self.credential
-        ) as service_client, service_client.get_container_client(self.container) as container_client:
+        async with self.get_service_client().get_container_client(self.container) as container_client:
             if not await container_client.exists():
                 return
             if path is None:
@@ -1,5 +1,9 @@
+import asyncio
+import hashlib
 import logging
 from abc import ABC
+from array import array
+from collections import OrderedDict
 from typing import Awaitable, Callable, List, Optional, Union
 from urllib.parse import urljoin
 
@@ -50,21 +54,43 @@ class OpenAIEmbeddings(ABC):
         "text-embedding-3-small": True,
         "text-embedding-3-large": True,
     }
+    MAX_CONCURRENT_BATCHES = 4
 
-    def __init__(self, open_ai_model_name: str, open_ai_dimensions: int, disable_batch: bool = False):
+    def __init__(
+        self, open_ai_model_name: str, open_ai_dimensions: int, disable_batch: bool = False, cache_size: int = 0
+    ):
         self.open_ai_model_name = open_ai_model_name
         self.open_ai_dimensions = open_ai_dimensions
         self.disable_batch = disable_batch
+        # Least recently used cache of embeddings, keyed by a hash of the model name and text.
+        # Vectors are stored as 32-bit float arrays, roughly 6 KB per entry for 1536 dimensions.
+        self.cache_size = max(0, cache_size)
+        self.cache: OrderedDict[bytes, array] = OrderedDict()
+        self.client: Optional[AsyncOpenAI] = None
+        self.encoding: Optional[tiktoken.Encoding] = None
 
     async def create_client(self) -> AsyncOpenAI:
         raise NotImplementedError
 
+    async def get_client(self) -> AsyncOpenAI:
+        # Reuse one client (and its connection pool) across calls instead of reconnecting for every file
+        if self.client is None:
+            self.client = await self.create_client()
+        return self.client
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+
     def before_retry_sleep(self, retry_state):
         logger.info("Rate limited on the OpenAI embeddings API, sleeping before retrying...")
 
     def calculate_token_length(self, text: str):
-        encoding = tiktoken.encoding_for_model(self.open_ai_model_name)
-        return len(encoding.encode(text))
+        # Look up the encoding once rather than for every text in every batch
+        if self.encoding is None:
+            self.encoding = tiktoken.encoding_for_model(self.open_ai_model_name)
+        return len(self.encoding.encode(text))
 
     def split_text_into_batches(self, texts: List[str]) -> List[EmbeddingBatch]:
         batch_info = OpenAIEmbeddings.SUPPORTED_BATCH_AOAI_MODEL.get(self.open_ai_model_name)
@@ -99,30 +125,42 @@ class OpenAIEmbeddings(ABC):
 
     async def create_embedding_batch(self, texts: List[str], dimensions_args: ExtraArgs) -> List[List[float]]:
         batches = self.split_text_into_batches(texts)
-        embeddings = []
-        client = await self.create_client()
-        for batch in batches:
-            async for attempt in AsyncRetrying(
-                retry=retry_if_exception_type(RateLimitError),
-                wait=wait_random_exponential(min=15, max=60),
-                stop=stop_after_attempt(15),
-                before_sleep=self.before_retry_sleep,
-            ):
-                with attempt:
-                    emb_response = await client.embeddings.create(
-                        model=self.open_ai_model_name, input=batch.texts, **dimensions_args
-                    )
-                    embeddings.extend([data.embedding for data in emb_response.data])
-                    logger.info(
-                        "Computed embeddings in batch. Batch size: %d, Token count: %d",
-                        len(batch.texts),
-                        batch.token_length,
-                    )
-
-        return embeddings
+        client = await self.get_client()
+        # Send a few batches at once so a large file isn't embedded one round trip at a time
+        semaphore = asyncio.Semaphore(OpenAIEmbeddings.MAX_CONCURRENT_BATCHES)
+
+        async def embed_batch(batch: EmbeddingBatch) -> List[List[float]]:
+            async with semaphore:
+                async for attempt in AsyncRetrying(
+                    retry=retry_if_exception_type(RateLimitError),
+                    wait=wait_random_exponential(min=15, max=60),
+                    stop=stop_after_attempt(15),
+                    before_sleep=self.before_retry_sleep,
+                ):
+                    with attempt:
+                        emb_response = await client.embeddings.create(
+                            model=self.open_ai_model_name, input=batch.texts, **dimensions_args
+                        )
+                        logger.info(
+                            "Computed embeddings in batch. Batch size: %d, Token count: %d",
+                            len(batch.texts),
+                            batch.token_length,
+                        )
+            return [data.embedding for data in emb_response.data]
+
+        tasks = [asyncio.create_task(embed_batch(batch)) for batch in batches]
+        try:
+            batch_embeddings = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't leave the other batches sleeping and retrying after one has failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        return [embedding for embeddings in batch_embeddings for embedding in embeddings]
 
     async def create_embedding_single(self, text: str, dimensions_args: ExtraArgs) -> List[float]:
-        client = await self.create_client()
+        client = await self.get_client()
         async for attempt in AsyncRetrying(
             retry=retry_if_exception_type(RateLimitError),
             wait=wait_random_exponential(min=15, max=60),
@@ -137,8 +175,35 @@ class OpenAIEmbeddings(ABC):
 
         return emb_response.data[0].embedding
 
-    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+    def cache_key(self, text: str) -> bytes:
+        return hashlib.sha256((self.open_ai_model_name + "\0" + text).encode()).digest()
 
+    async def create_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if not self.cache_size:
+            return await self.create_embeddings_uncached(texts)
+
+        keys = [self.cache_key(text) for text in texts]
+        embeddings: dict[bytes, List[float]] = {}
+        uncached_texts: dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                embeddings[key] = self.cache[key].tolist()
+            elif key not in embeddings:
+                uncached_texts[key] = text
+
+        if uncached_texts:
+            logger.info("Embeddings cache hits: %d, misses: %d", len(texts) - len(uncached_texts), len(uncached_texts))
+            new_embeddings = await self.create_embeddings_uncached(list(uncached_texts.values()))
+            for key, embedding in zip(uncached_texts.keys(), new_embeddings):
+                embeddings[key] = embedding
+                self.cache[key] = array("f", embedding)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+        return [embeddings[key] for key in keys]
+
+    async def create_embeddings_uncached(self, texts: List[str]) -> List[List[float]]:
         dimensions_args: ExtraArgs = (
             {"dimensions": self.open_ai_dimensions}
             if OpenAIEmbeddings.SUPPORTED_DIMENSIONS_MODEL.get(self.open_ai_model_name)
@@ -166,8 +231,9 @@ class AzureOpenAIEmbeddingService(OpenAIEmbeddings):
         credential: Union[AsyncTokenCredential, AzureKeyCredential],
         open_ai_custom_url: Union[str, None] = None,
         disable_batch: bool = False,
+        cache_size: int = 0,
     ):
-        super().__init__(open_ai_model_name, open_ai_dimensions, disable_batch)
+        super().__init__(open_ai_model_name, open_ai_dimensions, disable_batch, cache_size)
         self.open_ai_service = open_ai_service
         if open_ai_service:
             self.open_ai_endpoint = f"https://{open_ai_service}.openai.azure.com"
@@ -214,8 +280,9 @@ class OpenAIEmbeddingService(OpenAIEmbeddings):
         credential: str,
         organization: Optional[str] = None,
         disable_batch: bool = False,
+        cache_size: int = 0,
     ):
-        super().__init__(open_ai_model_name, open_ai_dimensions, disable_batch)
+        super().__init__(open_ai_model_name, open_ai_dimensions, disable_batch, cache_size)
         self.credential = credential
         self.organization = organization
 
@@ -229,6 +296,8 @@ class ImageEmbeddings:
     To learn more, please visit https://learn.microsoft.com/azure/ai-services/computer-vision/how-to/image-retrieval#call-the-vectorize-image-api
     """
 
+    MAX_CONCURRENT_REQUESTS = 8
+
     def __init__(self, endpoint: str, token_provider: Callable[[], Awaitable[str]]):
         self.token_provider = token_provider
         self.endpoint = endpoint
@@ -239,22 +308,35 @@ class ImageEmbeddings:
         params = {"api-version": "2023-02-01-preview", "modelVersion": "latest"}
         headers["Authorization"] = "Bearer " + await self.token_provider()
 
-        embeddings: List[List[float]] = []
-        async with aiohttp.ClientSession(headers=headers) as session:
-            for blob_url in blob_urls:
-                async for attempt in AsyncRetrying(
-                    retry=retry_if_exception_type(Exception),
-                    wait=wait_random_exponential(min=15, max=60),
-                    stop=stop_after_attempt(15),
-                    before_sleep=self.before_retry_sleep,
-                ):
-                    with attempt:
-                        body = {"url": blob_url}
-                        async with session.post(url=endpoint, params=params, json=body) as resp:
-                            resp_json = await resp.json()
-                            embeddings.append(resp_json["vector"])
-
-        return embeddings
+        # Vectorize several page images at once over a shared pool of keep-alive connections
+        semaphore = asyncio.Semaphore(ImageEmbeddings.MAX_CONCURRENT_REQUESTS)
+        connector = aiohttp.TCPConnector(limit=ImageEmbeddings.MAX_CONCURRENT_REQUESTS)
+        async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+
+            async def create_embedding(blob_url: str) -> List[float]:
+                async with semaphore:
+                    async for attempt in AsyncRetrying(
+                        retry=retry_if_exception_type(Exception),
+                        wait=wait_random_exponential(min=15, max=60),
+                        stop=stop_after_attempt(15),
+                        before_sleep=self.before_retry_sleep,
+                    ):
+                        with attempt:
+                            body = {"url": blob_url}
+                            async with session.post(url=endpoint, params=params, json=body) as resp:
+                                resp_json = await resp.json()
+                                embedding = resp_json["vector"]
+                return embedding
+
+            tasks = [asyncio.create_task(create_embedding(blob_url)) for blob_url in blob_urls]
+            try:
+                return await asyncio.gather(*tasks)
+            except BaseException:
+                # Stop the other requests before the session closes underneath them
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
 
     def before_retry_sleep(self, retry_state):
         logger.info("Rate limited on the Vision embeddings API, sleeping before retrying...")
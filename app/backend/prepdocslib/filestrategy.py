@@ -61,6 +61,9 @@ class FileStrategy(Strategy):
         self.search_info = search_info
         self.use_acls = use_acls
         self.category = category
+        self.search_manager = SearchManager(
+            self.search_info, self.search_analyzer_name, self.use_acls, False, self.embeddings
+        )
 
     async def setup(self):
         search_manager = SearchManager(
@@ -74,9 +77,6 @@ class FileStrategy(Strategy):
         await search_manager.create_index()
 
     async def run(self):
-        search_manager = SearchManager(
-            self.search_info, self.search_analyzer_name, self.use_acls, False, self.embeddings
-        )
         if self.document_action == DocumentAction.Add:
             files = self.list_file_strategy.list()
             async for file in files:
@@ -87,7 +87,7 @@ class FileStrategy(Strategy):
                         blob_image_embeddings: Optional[List[List[float]]] = None
                         if self.image_embeddings and blob_sas_uris:
                             blob_image_embeddings = await self.image_embeddings.create_embeddings(blob_sas_uris)
-                        await search_manager.update_content(sections, blob_image_embeddings, url=file.url)
+                        await self.search_manager.update_content(sections, blob_image_embeddings, url=file.url)
                 finally:
                     if file:
                         file.close()
@@ -95,10 +95,16 @@ class FileStrategy(Strategy):
             paths = self.list_file_strategy.list_paths()
             async for path in paths:
                 await self.blob_manager.remove_blob(path)
-                await search_manager.remove_content(path)
+                await self.search_manager.remove_content(path)
         elif self.document_action == DocumentAction.RemoveAll:
             await self.blob_manager.remove_blob()
-            await search_manager.remove_content()
+            await self.search_manager.remove_content()
+
+    async def close(self):
+        await self.blob_manager.close()
+        await self.search_manager.close()
+        if self.embeddings:
+            await self.embeddings.close()
 
 
 class UploadUserFileStrategy:
@@ -131,3 +137,8 @@ class UploadUserFileStrategy:
             logging.warning("Filename is required to remove a file")
             return
         await self.search_manager.remove_content(filename, oid)
+
+    async def close(self):
+        await self.search_manager.close()
+        if self.embeddings:
+            await self.embeddings.close()
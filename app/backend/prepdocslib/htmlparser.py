@@ -10,6 +10,11 @@ from .parser import Parser
 logger = logging.getLogger("ingester")
 
 
+MULTIPLE_NEWLINES_RE = re.compile(r"\n{2,}")
+MULTIPLE_SPACES_RE = re.compile(r"[^\S\n]{2,}")
+MULTIPLE_HYPHENS_RE = re.compile(r"-{2,}")
+
+
 def cleanup_data(data: str) -> str:
     """Cleans up the given content using regexes
     Args:
@@ -18,11 +23,11 @@ def cleanup_data(data: str) -> str:
         str: The cleaned up data.
     """
     # match two or more newlines and replace them with one new line
-    output = re.sub(r"\n{2,}", "\n", data)
+    output = MULTIPLE_NEWLINES_RE.sub("\n", data)
     # match two or more spaces that are not newlines and replace them with one space
-    output = re.sub(r"[^\S\n]{2,}", " ", output)
+    output = MULTIPLE_SPACES_RE.sub(" ", output)
     # match two or more hyphens and replace them with two hyphens
-    output = re.sub(r"-{2,}", "--", output)
+    output = MULTIPLE_HYPHENS_RE.sub("--", output)
 
     return output.strip()
 
@@ -202,3 +202,6 @@ class IntegratedVectorizerStrategy(Strategy):
         logger.info(
             f"Successfully created index, indexer: {indexer_result.name}, and skillset. Please navigate to search service in Azure Portal to view the status of the indexer."
         )
+
+    async def close(self):
+        await self.blob_manager.close()
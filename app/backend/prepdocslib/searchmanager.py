@@ -3,6 +3,7 @@ import logging
 import os
 from typing import List, Optional
 
+from azure.search.documents.aio import SearchClient
 from azure.search.documents.indexes.models import (
     HnswAlgorithmConfiguration,
     HnswParameters,
@@ -63,6 +64,18 @@ class SearchManager:
         # Integrated vectorization uses the ada-002 model with 1536 dimensions
         self.embedding_dimensions = self.embeddings.open_ai_dimensions if self.embeddings else 1536
         self.search_images = search_images
+        self.search_client: Optional[SearchClient] = None
+
+    def get_search_client(self) -> SearchClient:
+        # Reuse one client (and its connection pool) across uploads and removals instead of reconnecting each time
+        if self.search_client is None:
+            self.search_client = self.search_info.create_search_client()
+        return self.search_client
+
+    async def close(self):
+        if self.search_client is not None:
+            await self.search_client.close()
+            self.search_client = None
 
     async def create_index(self, vectorizers: Optional[List[VectorSearchVectorizer]] = None):
         logger.info("Ensuring search index %s exists", self.search_info.index_name)
@@ -206,74 +219,74 @@ class SearchManager:
         MAX_BATCH_SIZE = 1000
         section_batches = [sections[i : i + MAX_BATCH_SIZE] for i in range(0, len(sections), MAX_BATCH_SIZE)]
 
-        async with self.search_info.create_search_client() as search_client:
-            for batch_index, batch in enumerate(section_batches):
-                documents = [
-                    {
-                        "id": f"{section.content.filename_to_id()}-page-{section_index + batch_index * MAX_BATCH_SIZE}",
-                        "content": section.split_page.text,
-                        "category": section.category,
-                        "sourcepage": (
-                            BlobManager.blob_image_name_from_file_page(
-                                filename=section.content.filename(),
-                                page=section.split_page.page_num,
-                            )
-                            if image_embeddings
-                            else BlobManager.sourcepage_from_file_page(
-                                filename=section.content.filename(),
-                                page=section.split_page.page_num,
-                            )
-                        ),
-                        "sourcefile": section.content.filename(),
-                        **section.content.acls,
-                    }
-                    for section_index, section in enumerate(batch)
-                ]
-                if url:
-                    for document in documents:
-                        document["storageUrl"] = url
-                if self.embeddings:
-                    embeddings = await self.embeddings.create_embeddings(
-                        texts=[section.split_page.text for section in batch]
-                    )
-                    for i, document in enumerate(documents):
-                        document["embedding"] = embeddings[i]
-                if image_embeddings:
-                    for i, (document, section) in enumerate(zip(documents, batch)):
-                        document["imageEmbedding"] = image_embeddings[section.split_page.page_num]
+        search_client = self.get_search_client()
+        for batch_index, batch in enumerate(section_batches):
+            documents = [
+                {
+                    "id": f"{section.content.filename_to_id()}-page-{section_index + batch_index * MAX_BATCH_SIZE}",
+                    "content": section.split_page.text,
+                    "category": section.category,
+                    "sourcepage": (
+                        BlobManager.blob_image_name_from_file_page(
+                            filename=section.content.filename(),
+                            page=section.split_page.page_num,
+                        )
+                        if image_embeddings
+                        else BlobManager.sourcepage_from_file_page(
+                            filename=section.content.filename(),
+                            page=section.split_page.page_num,
+                        )
+                    ),
+                    "sourcefile": section.content.filename(),
+                    **section.content.acls,
+                }
+                for section_index, section in enumerate(batch)
+            ]
+            if url:
+                for document in documents:
+                    document["storageUrl"] = url
+            if self.embeddings:
+                embeddings = await self.embeddings.create_embeddings(
+                    texts=[section.split_page.text for section in batch]
+                )
+                for i, document in enumerate(documents):
+                    document["embedding"] = embeddings[i]
+            if image_embeddings:
+                for i, (document, section) in enumerate(zip(documents, batch)):
+                    document["imageEmbedding"] = image_embeddings[section.split_page.page_num]
 
-                await search_client.upload_documents(documents)
+            await search_client.upload_documents(documents)
 
     async def remove_content(self, path: Optional[str] = None, only_oid: Optional[str] = None):
         logger.info(
             "Removing sections from '{%s or '<all>'}' from search index '%s'", path, self.search_info.index_name
         )
-        async with self.search_info.create_search_client() as search_client:
-            while True:
-                filter = None
-                if path is not None:
-                    # Replace ' with '' to escape the single quote for the filter
-                    # https://learn.microsoft.com/azure/search/query-odata-filter-orderby-syntax#escaping-special-characters-in-string-constants
-                    path_for_filter = os.path.basename(path).replace("'", "''")
-                    filter = f"sourcefile eq '{path_for_filter}'"
-                max_results = 1000
-                result = await search_client.search(
-                    search_text="", filter=filter, top=max_results, include_total_count=True
-                )
-                result_count = await result.get_count()
-                if result_count == 0:
+        search_client = self.get_search_client()
+        while True:
+            filter = None
+            if path is not None:
+                # Replace ' with '' to escape the single quote for the filter
+                # https://learn.microsoft.com/azure/search/query-odata-filter-orderby-syntax#escaping-special-characters-in-string-constants
+                path_for_filter = os.path.basename(path).replace("'", "''")
+                filter = f"sourcefile eq '{path_for_filter}'"
+            max_results = 1000
+            result = await search_client.search(
+                search_text="", filter=filter, top=max_results, include_total_count=True
+            )
+            result_count = await result.get_count()
+            if result_count == 0:
+                break
+            documents_to_remove = []
+            async for document in result:
+                # If only_oid is set, only remove documents that have only this oid
+                if not only_oid or document.get("oids") == [only_oid]:
+                    documents_to_remove.append({"id": document["id"]})
+            if len(documents_to_remove) == 0:
+                if result_count < max_results:
                     break
-                documents_to_remove = []
-                async for document in result:
-                    # If only_oid is set, only remove documents that have only this oid
-                    if not only_oid or document.get("oids") == [only_oid]:
-                        documents_to_remove.append({"id": document["id"]})
-                if len(documents_to_remove) == 0:
-                    if result_count < max_results:
-                        break
-                    else:
-                        continue
-                removed_docs = await search_client.delete_documents(documents_to_remove)
-                logger.info("Removed %d sections from index", len(removed_docs))
-                # It can take a few seconds for search results to reflect changes, so wait a bit
-                await asyncio.sleep(2)
+                else:
+                    continue
+            removed_docs = await search_client.delete_documents(documents_to_remove)
+            logger.info("Removed %d sections from index", len(removed_docs))
+            # It can take a few seconds for search results to reflect changes, so wait a bit
+            await asyncio.sleep(2)
@@ -47,3 +47,6 @@ class Strategy(ABC):
 
     async def run(self):
         raise NotImplementedError
+
+    async def close(self):
+        pass
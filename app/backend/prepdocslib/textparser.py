@@ -4,6 +4,9 @@ from typing import IO, AsyncGenerator
 from .page import Page
 from .parser import Parser
 
+MULTIPLE_NEWLINES_RE = re.compile(r"\n{2,}")
+MULTIPLE_SPACES_RE = re.compile(r"[^\S\n]{2,}")
+
 
 def cleanup_data(data: str) -> str:
     """Cleans up the given content using regexes
@@ -13,9 +16,9 @@ def cleanup_data(data: str) -> str:
         str: The cleaned up data.
     """
     # match two or more newlines and replace them with one new line
-    output = re.sub(r"\n{2,}", "\n", data)
+    output = MULTIPLE_NEWLINES_RE.sub("\n", data)
     # match two or more spaces that are not newlines and replace them with one space
-    output = re.sub(r"[^\S\n]{2,}", " ", output)
+    output = MULTIPLE_SPACES_RE.sub(" ", output)
 
     return output.strip()
 
@@ -1,128 +1,98 @@
+import json
 import random
-import time
 
-from locust import HttpUser, between, task
+from locust import FastHttpUser, between, task
 
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-class ChatUser(HttpUser):
-    wait_time = between(5, 20)
+CHAT_OVERRIDES = {
+    "retrieval_mode": "hybrid",
+    "semantic_ranker": True,
+    "semantic_captions": False,
+    "top": 3,
+    "suggest_followup_questions": False,
+}
 
-    @task
-    def ask_question(self):
-        self.client.get("/")
-        time.sleep(5)
-        self.client.post(
-            "/chat",
-            json={
-                "messages": [
-                    {
-                        "content": random.choice(
-                            [
-                                "What is included in my Northwind Health Plus plan that is not in standard?",
-                                "What does a Product Manager do?",
-                                "What happens in a performance review?",
-                                "Whats your whistleblower policy?",
-                            ]
-                        ),
-                        "role": "user",
-                    },
-                ],
-                "context": {
-                    "overrides": {
-                        "retrieval_mode": "hybrid",
-                        "semantic_ranker": True,
-                        "semantic_captions": False,
-                        "top": 3,
-                        "suggest_followup_questions": False,
-                    },
-                },
-            },
-        )
-        time.sleep(5)
-        self.client.post(
-            "/chat",
-            json={
-                "messages": [
-                    {"content": "What happens in a performance review?", "role": "user"},
-                    {
-                        "content": "During a performance review, employees will receive feedback on their performance over the past year, including both successes and areas for improvement. The feedback will be provided by the employee's supervisor and is intended to help the employee develop and grow in their role [employee_handbook-3.pdf]. The review is a two-way dialogue between the employee and their manager, so employees are encouraged to be honest and open during the process [employee_handbook-3.pdf]. The employee will also have the opportunity to discuss their goals and objectives for the upcoming year [employee_handbook-3.pdf]. A written summary of the performance review will be provided to the employee, which will include a rating of their performance, feedback, and goals and objectives for the upcoming year [employee_handbook-3.pdf].",
-                        "role": "assistant",
-                    },
-                    {"content": "Does my plan cover eye exams?", "role": "user"},
-                ],
-                "context": {
-                    "overrides": {
-                        "retrieval_mode": "hybrid",
-                        "semantic_ranker": True,
-                        "semantic_captions": False,
-                        "top": 3,
-                        "suggest_followup_questions": False,
-                    },
-                },
-            },
-        )
+CHAT_VISION_OVERRIDES = {
+    "top": 3,
+    "temperature": 0.3,
+    "minimum_reranker_score": 0,
+    "minimum_search_score": 0,
+    "retrieval_mode": "hybrid",
+    "semantic_ranker": True,
+    "semantic_captions": False,
+    "suggest_followup_questions": False,
+    "use_oid_security_filter": False,
+    "use_groups_security_filter": False,
+    "vector_fields": ["embedding", "imageEmbedding"],
+    "use_gpt4v": True,
+    "gpt4v_input": "textAndImages",
+}
 
 
-class ChatVisionUser(HttpUser):
+class BaseChatUser(FastHttpUser):
+    abstract = True
     wait_time = between(5, 20)
+    # Fail fast when the app can't accept connections instead of waiting out the 60s default
+    connection_timeout = 10.0
+
+
+class ChatUser(BaseChatUser):
+    # Request bodies are the same for every user, so serialize them once
+    question_payloads = [
+        json.dumps({"messages": [{"content": question, "role": "user"}], "context": {"overrides": CHAT_OVERRIDES}})
+        for question in [
+            "What is included in my Northwind Health Plus plan that is not in standard?",
+            "What does a Product Manager do?",
+            "What happens in a performance review?",
+            "Whats your whistleblower policy?",
+        ]
+    ]
+    followup_payload = json.dumps(
+        {
+            "messages": [
+                {"content": "What happens in a performance review?", "role": "user"},
+                {
+                    "content": "During a performance review, employees will receive feedback on their performance over the past year, including both successes and areas for improvement. The feedback will be provided by the employee's supervisor and is intended to help the employee develop and grow in their role [employee_handbook-3.pdf]. The review is a two-way dialogue between the employee and their manager, so employees are encouraged to be honest and open during the process [employee_handbook-3.pdf]. The employee will also have the opportunity to discuss their goals and objectives for the upcoming year [employee_handbook-3.pdf]. A written summary of the performance review will be provided to the employee, which will include a rating of their performance, feedback, and goals and objectives for the upcoming year [employee_handbook-3.pdf].",
+                    "role": "assistant",
+                },
+                {"content": "Does my plan cover eye exams?", "role": "user"},
+            ],
+            "context": {"overrides": CHAT_OVERRIDES},
+        }
+    )
+
+    def on_start(self):
+        self.client.get("/")
 
     @task
     def ask_question(self):
-        self.client.get("/")
-        time.sleep(5)
-        self.client.post(
-            "/chat/stream",
-            json={
-                "messages": [
-                    {
-                        "content": "Can you identify any correlation between oil prices and stock market trends?",
-                        "role": "user",
-                    }
-                ],
-                "context": {
-                    "overrides": {
-                        "top": 3,
-                        "temperature": 0.3,
-                        "minimum_reranker_score": 0,
-                        "minimum_search_score": 0,
-                        "retrieval_mode": "hybrid",
-                        "semantic_ranker": True,
-                        "semantic_captions": False,
-                        "suggest_followup_questions": False,
-                        "use_oid_security_filter": False,
-                        "use_groups_security_filter": False,
-                        "vector_fields": ["embedding", "imageEmbedding"],
-                        "use_gpt4v": True,
-                        "gpt4v_input": "textAndImages",
-                    }
-                },
-                "session_state": None,
-            },
-        )
-        time.sleep(5)
-        self.client.post(
-            "/chat/stream",
-            json={
-                "messages": [
-                    {"content": "Compare the impact of interest rates and GDP in financial markets.", "role": "user"}
-                ],
-                "context": {
-                    "overrides": {
-                        "top": 3,
-                        "temperature": 0.3,
-                        "minimum_reranker_score": 0,
-                        "minimum_search_score": 0,
-                        "retrieval_mode": "hybrid",
-                        "semantic_ranker": True,
-                        "semantic_captions": False,
-                        "suggest_followup_questions": False,
-                        "use_oid_security_filter": False,
-                        "use_groups_security_filter": False,
-                        "vector_fields": ["embedding", "imageEmbedding"],
-                        "use_gpt4v": True,
-                        "gpt4v_input": "textAndImages",
-                    }
-                },
+        self.client.post("/chat", data=random.choice(self.question_payloads), headers=JSON_HEADERS)
+
+    @task
+    def ask_followup_question(self):
+        self.client.post("/chat", data=self.followup_payload, headers=JSON_HEADERS)
+
+
+class ChatVisionUser(BaseChatUser):
+    # Request bodies are the same for every user, so serialize them once
+    question_payloads = [
+        json.dumps(
+            {
+                "messages": [{"content": question, "role": "user"}],
+                "context": {"overrides": CHAT_VISION_OVERRIDES},
                 "session_state": None,
-            },
+            }
         )
+        for question in [
+            "Can you identify any correlation between oil prices and stock market trends?",
+            "Compare the impact of interest rates and GDP in financial markets.",
+        ]
+    ]
+
+    def on_start(self):
+        self.client.get("/")
+
+    @task
+    def ask_question(self):
+        self.client.post("/chat/stream", data=random.choice(self.question_payloads), headers=JSON_HEADERS)
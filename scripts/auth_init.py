@@ -71,7 +71,7 @@ async def create_or_update_application_with_secret(
 
 
 def update_azd_env(name, val):
-    subprocess.run(f"azd env set {name} {val}", shell=True)
+    subprocess.run(["azd", "env", "set", name, val])
 
 
 def random_app_identifier():
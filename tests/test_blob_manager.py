@@ -1,11 +1,15 @@
+import base64
 import os
 import sys
 from tempfile import NamedTemporaryFile
+from urllib.parse import quote
 
 import azure.storage.blob.aio
 import pytest
+from azure.storage.blob import UserDelegationKey
 
-from prepdocslib.blobmanager import BlobManager
+import prepdocslib.blobmanager
+from prepdocslib.blobmanager import BlobManager, open_pdf
 from prepdocslib.listfilestrategy import File
 
 from .mocks import MockAzureCredential
@@ -196,6 +200,70 @@ async def test_upload_blob_no_image(monkeypatch, mock_env, caplog):
             assert "skipping image upload" in caplog.text
 
 
+@pytest.mark.asyncio
+@pytest.mark.skipif(sys.version_info.minor < 10, reason="requires Python 3.10 or higher")
+async def test_upload_blob_pdf_images(monkeypatch, mock_env):
+    blob_manager = BlobManager(
+        endpoint=f"https://{os.environ['AZURE_STORAGE_ACCOUNT']}.blob.core.windows.net",
+        credential=MockAzureCredential(),
+        container=os.environ["AZURE_STORAGE_CONTAINER"],
+        account=os.environ["AZURE_STORAGE_ACCOUNT"],
+        resourceGroup=os.environ["AZURE_STORAGE_RESOURCE_GROUP"],
+        subscriptionId=os.environ["AZURE_SUBSCRIPTION_ID"],
+        store_page_images=True,
+    )
+    # Fewer workers than pages, so rendering has to keep up with the uploads
+    blob_manager.render_workers = 2
+
+    async def mock_exists(*args, **kwargs):
+        return True
+
+    monkeypatch.setattr("azure.storage.blob.aio.ContainerClient.exists", mock_exists)
+
+    uploaded_blobs = []
+
+    async def mock_upload_blob(self, name, data, *args, **kwargs):
+        uploaded_blobs.append((name, data.read()))
+        return azure.storage.blob.aio.BlobClient.from_blob_url(
+            f"https://test.blob.core.windows.net/test/{quote(name)}", credential=MockAzureCredential()
+        )
+
+    monkeypatch.setattr("azure.storage.blob.aio.ContainerClient.upload_blob", mock_upload_blob)
+
+    async def mock_get_user_delegation_key(self, key_start_time, key_expiry_time, **kwargs):
+        key = UserDelegationKey()
+        key.signed_oid = "oid"
+        key.signed_tid = "tid"
+        key.signed_start = key_start_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        key.signed_expiry = key_expiry_time.strftime("%Y-%m-%dT%H:%M:%SZ")
+        key.signed_service = "b"
+        key.signed_version = "2023-11-03"
+        key.value = base64.b64encode(b"key").decode()
+        return key
+
+    monkeypatch.setattr(
+        "azure.storage.blob.aio.BlobServiceClient.get_user_delegation_key", mock_get_user_delegation_key
+    )
+
+    pdf_path = os.path.join(os.path.dirname(__file__), "test-data", "en_An Occurrence at Owl Creek Bridge.pdf")
+    with open(pdf_path, "rb") as pdf:
+        f = File(pdf)
+        sas_uris = await blob_manager.upload_blob(f)
+    await blob_manager.close()
+    assert blob_manager.executor is None
+
+    page_names = [f"en_An Occurrence at Owl Creek Bridge-{i}.png" for i in range(13)]
+    assert [name for name, _ in uploaded_blobs] == ["en_An Occurrence at Owl Creek Bridge.pdf"] + page_names
+    for _, image in uploaded_blobs[1:]:
+        assert image.startswith(b"\x89PNG")
+    assert sas_uris is not None
+    assert len(sas_uris) == 13
+    for sas_uri, page_name in zip(sas_uris, page_names):
+        assert sas_uri.startswith(f"https://test.blob.core.windows.net/test/{quote(page_name)}?")
+        assert "sp=r" in sas_uri
+        assert "sig=" in sas_uri
+
+
 @pytest.mark.asyncio
 @pytest.mark.skipif(sys.version_info.minor < 10, reason="requires Python 3.10 or higher")
 async def test_dont_remove_if_no_container(monkeypatch, mock_env, blob_manager):
@@ -212,6 +280,28 @@ async def test_dont_remove_if_no_container(monkeypatch, mock_env, blob_manager):
     await blob_manager.remove_blob()
 
 
+def test_open_pdf_closes_previous_document():
+    test_data = os.path.join(os.path.dirname(__file__), "test-data")
+    first_path = os.path.join(test_data, "ja_RTL_TopToBottom_Test.pdf")
+    second_path = os.path.join(test_data, "ko_도시로 간 쥐.pdf")
+
+    try:
+        first = open_pdf(first_path, 1)
+        assert open_pdf(first_path, 1) is first
+        second = open_pdf(second_path, 1)
+        assert first.is_closed
+        assert not second.is_closed
+        # A changed modification time means the file was overwritten, so it is opened again
+        assert open_pdf(second_path, 2) is not second
+        assert second.is_closed
+    finally:
+        # Don't leave an open document behind for render workers forked later in the test run
+        if prepdocslib.blobmanager._open_pdf_doc is not None:
+            prepdocslib.blobmanager._open_pdf_doc.close()
+        prepdocslib.blobmanager._open_pdf_doc = None
+        prepdocslib.blobmanager._open_pdf_key = None
+
+
 def test_get_managed_identity_connection_string(mock_env, blob_manager):
     assert (
         blob_manager.get_managedidentity_connectionstring()
@@ -198,3 +198,53 @@ async def test_search_results_filtering_by_scores(
     assert (
         len(filtered_results) == expected_result_count
     ), f"Expected {expected_result_count} results with minimum_search_score={minimum_search_score} and minimum_reranker_score={minimum_reranker_score}"
+
+
+def mock_paged_search(pages):
+    async def mock_search(*args, **kwargs):
+        results = MockAsyncSearchResultsIterator(kwargs.get("search_text"), kwargs.get("vector_queries"))
+        results.data = pages
+        return results
+
+    return mock_search
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "pages, expected_ids",
+    [
+        ([], []),
+        ([[]], []),
+        (
+            [
+                [
+                    {"id": "page1-kept", "@search.score": 0.5, "@search.reranker_score": 3.0},
+                    {"id": "page1-low-score", "@search.score": 0.01, "@search.reranker_score": 3.0},
+                ],
+                [
+                    {"id": "page2-low-reranker-score", "@search.score": 0.6, "@search.reranker_score": 1.0},
+                    {"id": "page2-kept", "@search.score": 0.7, "@search.reranker_score": 3.0},
+                ],
+            ],
+            ["page1-kept", "page2-kept"],
+        ),
+    ],
+)
+async def test_search_results_filtering_across_pages(monkeypatch, chat_approach, pages, expected_ids):
+    chat_approach.search_client = SearchClient(endpoint="", index_name="", credential=AzureKeyCredential(""))
+    monkeypatch.setattr(SearchClient, "search", mock_paged_search(pages))
+
+    filtered_results = await chat_approach.search(
+        top=10,
+        query_text="test query",
+        filter=None,
+        vectors=[],
+        use_text_search=True,
+        use_vector_search=True,
+        use_semantic_ranker=True,
+        use_semantic_captions=True,
+        minimum_search_score=0.02,
+        minimum_reranker_score=2,
+    )
+
+    assert [document.id for document in filtered_results] == expected_ids
@@ -1,3 +1,4 @@
+import asyncio
 import json
 
 import pytest
@@ -148,3 +149,26 @@ async def test_compute_text_embedding(chat_approach, openai_client, mock_openai_
     assert result.vector == [0.0023064255, -0.009327292, -0.0028842222]
     assert result.k_nearest_neighbors == 50
     assert result.fields == "embedding"
+
+
+@pytest.mark.asyncio
+async def test_compute_vector_field_embeddings_failure_cancels_others(chat_approach, monkeypatch):
+    cancelled = []
+
+    async def mock_compute_text_embedding(q):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(q)
+            raise
+
+    async def mock_compute_image_embedding(q):
+        raise Exception("Vision API error")
+
+    monkeypatch.setattr(chat_approach, "compute_text_embedding", mock_compute_text_embedding)
+    monkeypatch.setattr(chat_approach, "compute_image_embedding", mock_compute_image_embedding)
+
+    with pytest.raises(Exception, match="Vision API error"):
+        await chat_approach.compute_vector_field_embeddings("test query", ["embedding", "imageEmbedding"])
+    # The text embedding request is stopped rather than left running
+    assert cancelled == ["test query"]
@@ -37,39 +37,44 @@ class MockAiohttpClientResponse(aiohttp.ClientResponse):
         self._url = url
 
 
+class MockTransport(AsyncHttpTransport):
+    content = b"test content"
+
+    async def send(self, request: HttpRequest, **kwargs) -> AioHttpTransportResponse:
+        if request.url.endswith("notfound.pdf") or request.url.endswith("userdoc.pdf"):
+            raise ResourceNotFoundError(MockAiohttpClientResponse404(request.url, b""))
+        # The SDK asks for each chunk with an x-ms-range header, and the end of the range is inclusive
+        start, end = request.headers["x-ms-range"].removeprefix("bytes=").split("-")
+        body = self.content[int(start) : int(end) + 1]
+        return AioHttpTransportResponse(
+            request,
+            MockAiohttpClientResponse(
+                request.url,
+                body,
+                {
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": f"bytes {start}-{int(start) + len(body) - 1}/{len(self.content)}",
+                    "Content-Length": str(len(body)),
+                },
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        pass
+
+
 @pytest.mark.asyncio
 async def test_content_file(monkeypatch, mock_env, mock_acs_search):
 
-    class MockTransport(AsyncHttpTransport):
-        async def send(self, request: HttpRequest, **kwargs) -> AioHttpTransportResponse:
-            if request.url.endswith("notfound.pdf") or request.url.endswith("userdoc.pdf"):
-                raise ResourceNotFoundError(MockAiohttpClientResponse404(request.url, b""))
-            else:
-                return AioHttpTransportResponse(
-                    request,
-                    MockAiohttpClientResponse(
-                        request.url,
-                        b"test content",
-                        {
-                            "Content-Type": "application/octet-stream",
-                            "Content-Range": "bytes 0-27/28",
-                            "Content-Length": "28",
-                        },
-                    ),
-                )
-
-        async def __aenter__(self):
-            return self
-
-        async def __aexit__(self, *args):
-            pass
-
-        async def open(self):
-            pass
-
-        async def close(self):
-            pass
-
     blob_client = BlobServiceClient(
         f"https://{os.environ['AZURE_STORAGE_ACCOUNT']}.blob.core.windows.net",
         credential=MockAzureCredential(),
@@ -89,14 +94,54 @@ async def test_content_file(monkeypatch, mock_env, mock_acs_search):
         response = await client.get("/content/role_library.pdf")
         assert response.status_code == 200
         assert response.headers["Content-Type"] == "application/pdf"
+        assert response.headers["Content-Length"] == "12"
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert response.headers["Cache-Control"] == "public"
         assert await response.get_data() == b"test content"
 
         response = await client.get("/content/role_library.pdf#page=10")
         assert response.status_code == 200
         assert response.headers["Content-Type"] == "application/pdf"
+        assert response.headers["Content-Length"] == "12"
         assert await response.get_data() == b"test content"
 
 
+@pytest.mark.asyncio
+async def test_content_file_range(monkeypatch, mock_env, mock_acs_search):
+    blob_client = BlobServiceClient(
+        f"https://{os.environ['AZURE_STORAGE_ACCOUNT']}.blob.core.windows.net",
+        credential=MockAzureCredential(),
+        transport=MockTransport(),
+        retry_total=0,  # Necessary to avoid unnecessary network requests during tests
+    )
+    blob_container_client = blob_client.get_container_client(os.environ["AZURE_STORAGE_CONTAINER"])
+
+    quart_app = app.create_app()
+    async with quart_app.test_app() as test_app:
+        quart_app.config.update({"blob_container_client": blob_container_client})
+
+        client = test_app.test_client()
+        response = await client.get("/content/role_library.pdf", headers={"Range": "bytes=5-11"})
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == "bytes 5-11/12"
+        assert response.headers["Content-Length"] == "7"
+        assert response.headers["Accept-Ranges"] == "bytes"
+        assert await response.get_data() == b"content"
+
+        # An open-ended range runs to the end of the file
+        response = await client.get("/content/role_library.pdf", headers={"Range": "bytes=5-"})
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == "bytes 5-11/12"
+        assert await response.get_data() == b"content"
+
+        # A range past the end of the file is cut short at the end of the file
+        response = await client.get("/content/role_library.pdf", headers={"Range": "bytes=5-100"})
+        assert response.status_code == 206
+        assert response.headers["Content-Range"] == "bytes 5-11/12"
+        assert response.headers["Content-Length"] == "7"
+        assert await response.get_data() == b"content"
+
+
 @pytest.mark.asyncio
 async def test_content_file_useruploaded_found(monkeypatch, auth_client, mock_blob_container_client):
 
@@ -118,6 +163,9 @@ async def test_content_file_useruploaded_found(monkeypatch, auth_client, mock_bl
 
     response = await auth_client.get("/content/userdoc.pdf", headers={"Authorization": "Bearer test"})
     assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/pdf"
+    assert response.headers["Content-Length"] == "4"
+    assert await response.get_data() == b"test"
     assert len(downloaded_files) == 1
 
 
@@ -1,5 +1,9 @@
+import asyncio
+import json
 import logging
+from array import array
 
+import aiohttp
 import openai
 import openai.types
 import pytest
@@ -9,6 +13,7 @@ from openai.types.create_embedding_response import Usage
 
 from prepdocslib.embeddings import (
     AzureOpenAIEmbeddingService,
+    ImageEmbeddings,
     OpenAIEmbeddingService,
 )
 
@@ -16,6 +21,7 @@ from .mocks import (
     MOCK_EMBEDDING_DIMENSIONS,
     MOCK_EMBEDDING_MODEL_NAME,
     MockAzureCredential,
+    MockResponse,
 )
 
 
@@ -210,3 +216,240 @@ async def test_compute_embedding_autherror(monkeypatch, capsys):
         )
         monkeypatch.setattr(embeddings, "create_client", create_auth_error_limit_client)
         await embeddings.create_embeddings(texts=["foo"])
+
+
+class CountingMockEmbeddingsClient:
+    def __init__(self):
+        self.inputs = []
+
+    async def create(self, *args, **kwargs) -> openai.types.CreateEmbeddingResponse:
+        texts = kwargs["input"] if isinstance(kwargs["input"], list) else [kwargs["input"]]
+        self.inputs.append(texts)
+        return openai.types.CreateEmbeddingResponse(
+            object="list",
+            data=[
+                openai.types.Embedding(embedding=[float(len(text))], index=index, object="embedding")
+                for index, text in enumerate(texts)
+            ],
+            model="text-embedding-ada-002",
+            usage=Usage(prompt_tokens=8, total_tokens=8),
+        )
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_cache(monkeypatch):
+    embeddings_client = CountingMockEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = AzureOpenAIEmbeddingService(
+        open_ai_service="x",
+        open_ai_deployment="x",
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        disable_batch=False,
+        cache_size=2,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    assert await embeddings.create_embeddings(texts=["a", "bb", "a"]) == [[1.0], [2.0], [1.0]]
+    assert embeddings_client.inputs == [["a", "bb"]]
+
+    # Only texts missing from the cache are sent to the API
+    assert await embeddings.create_embeddings(texts=["ccc", "bb"]) == [[3.0], [2.0]]
+    assert embeddings_client.inputs == [["a", "bb"], ["ccc"]]
+
+    # "a" was the least recently used entry, so it was evicted
+    assert len(embeddings.cache) == 2
+    # Cached vectors are stored compactly rather than as lists of Python floats
+    assert all(isinstance(vector, array) for vector in embeddings.cache.values())
+    assert await embeddings.create_embeddings(texts=["a"]) == [[1.0]]
+    assert embeddings_client.inputs == [["a", "bb"], ["ccc"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_negative_cache_size(monkeypatch):
+    embeddings_client = CountingMockEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = AzureOpenAIEmbeddingService(
+        open_ai_service="x",
+        open_ai_deployment="x",
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        disable_batch=False,
+        cache_size=-1,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    # A negative size disables the cache instead of evicting from an empty one
+    assert await embeddings.create_embeddings(texts=["a", "a"]) == [[1.0], [1.0]]
+    assert await embeddings.create_embeddings(texts=["a"]) == [[1.0]]
+    assert embeddings_client.inputs == [["a", "a"], ["a"]]
+    assert len(embeddings.cache) == 0
+
+
+class OutOfOrderMockEmbeddingsClient:
+    def __init__(self):
+        self.inputs = []
+        self.completed = []
+
+    async def create(self, *args, **kwargs) -> openai.types.CreateEmbeddingResponse:
+        texts = kwargs["input"]
+        call_index = len(self.inputs)
+        self.inputs.append(texts)
+        # Earlier batches take longer, so responses come back in reverse order
+        await asyncio.sleep(0.05 / (call_index + 1))
+        self.completed.append(call_index)
+        return openai.types.CreateEmbeddingResponse(
+            object="list",
+            data=[
+                openai.types.Embedding(embedding=[float(text)], index=index, object="embedding")
+                for index, text in enumerate(texts)
+            ],
+            model="text-embedding-ada-002",
+            usage=Usage(prompt_tokens=8, total_tokens=8),
+        )
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_multiple_batches(monkeypatch):
+    embeddings_client = OutOfOrderMockEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = AzureOpenAIEmbeddingService(
+        open_ai_service="x",
+        open_ai_deployment="x",
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        disable_batch=False,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    texts = [str(i) for i in range(40)]
+    assert await embeddings.create_embeddings(texts=texts) == [[float(i)] for i in range(40)]
+    # Requests are split at the model's max batch size of 16
+    assert embeddings_client.inputs == [texts[:16], texts[16:32], texts[32:]]
+    assert embeddings_client.completed == [2, 1, 0]
+
+
+class FailingBatchMockEmbeddingsClient:
+    def __init__(self):
+        self.cancelled = 0
+
+    async def create(self, *args, **kwargs) -> openai.types.CreateEmbeddingResponse:
+        if kwargs["input"][0] == "0":
+            raise openai.AuthenticationError(message="Bad things happened.", response=fake_response(403), body=None)
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        raise AssertionError("batch should have been cancelled")
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_failed_batch_cancels_others(monkeypatch):
+    embeddings_client = FailingBatchMockEmbeddingsClient()
+
+    async def mock_create_client(*args, **kwargs):
+        return MockClient(embeddings_client=embeddings_client)
+
+    embeddings = AzureOpenAIEmbeddingService(
+        open_ai_service="x",
+        open_ai_deployment="x",
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        disable_batch=False,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    with pytest.raises(openai.AuthenticationError):
+        await embeddings.create_embeddings(texts=[str(i) for i in range(40)])
+    # The other two batches are stopped rather than left running
+    assert embeddings_client.cancelled == 2
+
+
+class ClosableMockClient(MockClient):
+    def __init__(self, embeddings_client):
+        super().__init__(embeddings_client)
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_compute_embedding_reuses_client(monkeypatch):
+    clients = []
+
+    async def mock_create_client(*args, **kwargs):
+        clients.append(ClosableMockClient(embeddings_client=CountingMockEmbeddingsClient()))
+        return clients[-1]
+
+    embeddings = AzureOpenAIEmbeddingService(
+        open_ai_service="x",
+        open_ai_deployment="x",
+        open_ai_model_name=MOCK_EMBEDDING_MODEL_NAME,
+        open_ai_dimensions=MOCK_EMBEDDING_DIMENSIONS,
+        credential=MockAzureCredential(),
+        disable_batch=False,
+    )
+    monkeypatch.setattr(embeddings, "create_client", mock_create_client)
+    await embeddings.create_embeddings(texts=["a"])
+    await embeddings.create_embeddings(texts=["bb"])
+    assert len(clients) == 1
+    assert clients[0].embeddings.inputs == [["a"], ["bb"]]
+
+    await embeddings.close()
+    assert clients[0].closed
+    await embeddings.create_embeddings(texts=["ccc"])
+    assert len(clients) == 2
+    assert not clients[1].closed
+
+
+class DelayedMockResponse(MockResponse):
+    def __init__(self, text, status, delay):
+        super().__init__(text, status)
+        self.delay = delay
+
+    async def json(self):
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            raise Exception("Vision API error")
+        return json.loads(self.text)
+
+
+@pytest.mark.asyncio
+async def test_image_embeddings_order_and_retry(monkeypatch, caplog):
+    blob_urls = [f"https://blob/page{i}.png" for i in range(10)]
+    requested_urls = []
+
+    def mock_post(*args, **kwargs):
+        assert kwargs.get("url") == "https://vision/computervision/retrieval:vectorizeImage"
+        blob_url = kwargs["json"]["url"]
+        requested_urls.append(blob_url)
+        index = blob_urls.index(blob_url)
+        # Earlier pages respond last, and page 3 fails on its first attempt
+        status = 500 if blob_url == blob_urls[3] and requested_urls.count(blob_url) == 1 else 200
+        return DelayedMockResponse(
+            text=json.dumps({"vector": [float(index)]}), status=status, delay=0.01 * (len(blob_urls) - index)
+        )
+
+    async def mock_token_provider():
+        return "token"
+
+    monkeypatch.setattr(aiohttp.ClientSession, "post", mock_post)
+    monkeypatch.setattr(tenacity.wait_random_exponential, "__call__", lambda x, y: 0)
+    image_embeddings = ImageEmbeddings(endpoint="https://vision/", token_provider=mock_token_provider)
+    with caplog.at_level(logging.INFO):
+        assert await image_embeddings.create_embeddings(blob_urls) == [[float(i)] for i in range(10)]
+    # Only the failed page is retried
+    assert requested_urls.count(blob_urls[3]) == 2
+    assert sorted(requested_urls) == sorted(blob_urls + [blob_urls[3]])
+    assert caplog.text.count("Rate limited on the Vision embeddings API") == 1
@@ -239,6 +239,37 @@ async def test_update_content_many(monkeypatch, search_info):
     assert len(set(ids)) == 1500, "Document ids are not unique"
 
 
+@pytest.mark.asyncio
+async def test_update_content_reuses_search_client(monkeypatch, search_info):
+    clients = []
+    closed = []
+
+    async def mock_upload_documents(self, documents):
+        clients.append(self)
+
+    async def mock_close(self):
+        closed.append(self)
+
+    monkeypatch.setattr(SearchClient, "upload_documents", mock_upload_documents)
+    monkeypatch.setattr(SearchClient, "close", mock_close)
+
+    manager = SearchManager(search_info)
+
+    test_io = io.BytesIO(b"test content")
+    test_io.name = "test/foo.pdf"
+    sections = [Section(split_page=SplitPage(page_num=0, text="test content"), content=File(test_io))]
+    await manager.update_content(sections)
+    await manager.update_content(sections)
+    assert len(clients) == 2
+    assert clients[0] is clients[1]
+    assert closed == []
+
+    await manager.close()
+    assert closed == [clients[0]]
+    await manager.update_content(sections)
+    assert clients[2] is not clients[0]
+
+
 @pytest.mark.asyncio
 async def test_update_content_with_embeddings(monkeypatch, search_info):
     async def mock_create_client(*args, **kwargs):